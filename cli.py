@@ -0,0 +1,133 @@
+# cli.py
+
+import argparse
+import json
+import logging
+import os
+import fitz  # PyMuPDF
+from data.processing import process_data, read_roster
+from data.selection import RosterIndex, prefilter_roster, save_last_run
+from pdf.generator import generate_pdf, save_pdf
+from utils.progress import ProgressReporter, log_progress
+from utils.resources import resource_path, sanitize_font_name
+
+
+def load_offsets():
+    """從 config/config.json 讀取偏移量，與 GUI 使用相同的預設值"""
+    offset_x, offset_y = -1.8, -1.6
+    if os.path.exists('config/config.json'):
+        with open('config/config.json', 'r', encoding='utf-8') as f:
+            config = json.load(f)
+            offset_x = config.get('offset_x', offset_x)
+            offset_y = config.get('offset_y', offset_y)
+    return offset_x, offset_y
+
+
+def split_values(values):
+    """將以空白或逗號分隔的參數拆成列表"""
+    result = []
+    for value in values or []:
+        result.extend(value.replace("，", ",").replace(",", " ").split())
+    return result
+
+
+def run_generate(args):
+    """命令列生成工作證，可依條件只生成部分資料"""
+    df = read_roster(args.excel)
+    # 先以原始欄位縮小名冊，只處理符合的列
+    df = prefilter_roster(df, ids=split_values(args.ids), names=split_values(args.names), company=args.company)
+    data = process_data(df, args.images)
+    index = RosterIndex(data)
+
+    # 有效期限與變更條件需處理後的欄位
+    selected = index.select(
+        expiry_from=args.expiry_from,
+        expiry_to=args.expiry_to,
+        changed_only=args.changed
+    )
+    if selected.empty:
+        logging.warning("沒有符合篩選條件的工作證")
+        return 1
+
+    if args.list:
+        for row in selected.itertuples(index=False):
+            print(f"{row.工作證號碼}\t{row.姓名}\t{row.公司名稱}\t{row.有效期限}")
+        return 0
+
+    offset_x, offset_y = load_offsets()
+    if args.offset_x is not None:
+        offset_x = args.offset_x
+    if args.offset_y is not None:
+        offset_y = args.offset_y
+
+    pdf_filename = args.output
+    if not pdf_filename.endswith(".pdf"):
+        pdf_filename += ".pdf"
+
+    template_pdf_front = resource_path("templates/工作證模板(正).pdf")
+    template_pdf_back = resource_path("templates/工作證模板(背).pdf")
+    font_name = sanitize_font_name("kaiu")
+
+    # 命令列每秒輸出一次進度
+    progress = ProgressReporter(log_progress, total=len(selected) * 2, stage="生成工作證", unit="面", interval=1.0)
+
+    doc = fitz.open()
+    try:
+        generate_pdf(doc, selected, template_pdf_front, template_pdf_back, args.images, font_name, progress, offset_x, offset_y)
+        progress.finish()
+        doc.set_metadata({"title": os.path.basename(pdf_filename)})
+        save_pdf(doc, pdf_filename)
+    finally:
+        doc.close()
+    save_last_run(selected)
+    logging.info(f"成功保存 PDF 工作證文件: {pdf_filename}")
+    return 0
+
+
+def run_serve(args):
+    """以本機 HTTP 服務模式執行"""
+    from service.server import serve
+    offset_x, offset_y = load_offsets()
+    serve(args.images, host=args.host, port=args.port, max_workers=args.workers,
+          max_pending=args.max_pending, offset_x=offset_x, offset_y=offset_y)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="SBR", description="SBR工作證生成器命令列模式")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="生成工作證 PDF")
+    generate.add_argument("--excel", required=True, help="Excel 名冊")
+    generate.add_argument("--images", required=True, help="圖片資料夾")
+    generate.add_argument("--output", default="workpasses_double_sided.pdf", help="輸出 PDF 檔名")
+    generate.add_argument("--ids", nargs="*", help="只生成指定的工作證號碼")
+    generate.add_argument("--names", nargs="*", help="只生成指定的姓名")
+    generate.add_argument("--company", help="只生成指定公司")
+    generate.add_argument("--expiry-from", help="有效期限起 (民國 YYY.MM.DD)")
+    generate.add_argument("--expiry-to", help="有效期限迄 (民國 YYY.MM.DD)")
+    generate.add_argument("--changed", action="store_true", help="只生成上次生成後有變更的工作證")
+    generate.add_argument("--list", action="store_true", help="只列出符合條件的工作證，不生成 PDF")
+    generate.add_argument("--offset-x", type=float, help="背面水平偏移量 (點)")
+    generate.add_argument("--offset-y", type=float, help="背面垂直偏移量 (點)")
+    generate.set_defaults(func=run_generate)
+
+    serve = subparsers.add_parser("serve", help="啟動本機工作證生成服務")
+    serve.add_argument("--images", required=True, help="圖片資料夾")
+    serve.add_argument("--host", default="127.0.0.1", help="綁定位址，僅限本機位址 (如 127.0.0.1、::1、localhost)")
+    serve.add_argument("--port", type=int, default=8765, help="連接埠")
+    serve.add_argument("--workers", type=int, default=2, help="生成工作證的子程序數")
+    serve.add_argument("--max-pending", type=int, default=16, help="同時等待中的請求上限")
+    serve.set_defaults(func=run_serve)
+
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        logging.error(f"執行時出錯: {e}")
+        return 1
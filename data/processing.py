@@ -4,33 +4,63 @@ import logging
 import pandas as pd
 from datetime import datetime, timedelta
 import os
-from utils.resources import convert_to_minguo_date, find_image_path
-
-def process_data(df, image_folder):
-    """處理數據，包括計算訓練日期和匹配圖片路徑"""
-    processed_rows = []
-    for index, row in df.iterrows():
-        # 計算訓練日期：原始日期 + 3 年 - 1 天，格式轉換為民國 YYY.MM.DD
-        try:
-            original_minguo_date = str(row['訓練日期'])
-            minguo_date_str = convert_to_minguo_date(original_minguo_date)
-        except Exception as e:
-            logging.error(f"處理訓練日期錯誤，使用原始值: {row['訓練日期']}, 錯誤: {e}")
-            minguo_date_str = row['訓練日期']
-
-        # 匹配圖片路徑
-        name = str(row['姓名']).strip()
-        image_path = find_image_path(image_folder, name)
-        if not image_path:
-            logging.warning(f"找不到圖片: {name}")
-
-        processed_rows.append({
-            '公司名稱': row['公司名稱'],
-            '姓名': name,
-            '工作證號碼': row['工作證號碼'],
-            '有效期限': minguo_date_str,
-            '圖片路徑': image_path if image_path else ""
-        })
+from utils.resources import convert_to_minguo_date, build_image_index
 
+# Excel 文件必要的欄位
+REQUIRED_COLUMNS = ['公司名稱', '姓名', '工作證號碼', '訓練日期']
+
+def read_roster(excel_path):
+    """讀取 Excel 名冊並檢查必要欄位"""
+    df = pd.read_excel(excel_path, engine='openpyxl')
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError(f"Excel 文件缺少必要的欄位: {REQUIRED_COLUMNS}")
+    return df
+
+# 分批處理時每批的列數
+CHUNK_SIZE = 500
+
+def process_row(row, image_index):
+    """處理單列數據，計算有效期限並匹配圖片路徑"""
+    # 計算訓練日期：原始日期 + 3 年 - 1 天，格式轉換為民國 YYY.MM.DD
+    try:
+        original_minguo_date = str(row['訓練日期'])
+        minguo_date_str = convert_to_minguo_date(original_minguo_date)
+    except Exception as e:
+        logging.error(f"處理訓練日期錯誤，使用原始值: {row['訓練日期']}, 錯誤: {e}")
+        minguo_date_str = row['訓練日期']
+
+    # 匹配圖片路徑
+    name = str(row['姓名']).strip()
+    image_path = image_index.get(name.lower())
+    if not image_path:
+        logging.warning(f"找不到圖片: {name}")
+
+    return {
+        '公司名稱': row['公司名稱'],
+        '姓名': name,
+        '工作證號碼': row['工作證號碼'],
+        '有效期限': minguo_date_str,
+        '圖片路徑': image_path if image_path else ""
+    }
+
+def iter_process_data(df, image_folder, image_index=None, chunk_size=CHUNK_SIZE, cancel_event=None):
+    """
+    分批處理數據，每批產生一個 DataFrame，供介面逐步顯示。
+    cancel_event 被設定時停止處理。
+    """
+    # 圖片資料夾只掃描一次，避免每列重新列舉目錄
+    if image_index is None:
+        image_index = build_image_index(image_folder)
+    for start in range(0, len(df), chunk_size):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        chunk = df.iloc[start:start + chunk_size]
+        yield pd.DataFrame([process_row(row, image_index) for _, row in chunk.iterrows()])
+
+def process_data(df, image_folder, image_index=None):
+    """處理數據，包括計算訓練日期和匹配圖片路徑；可傳入已建立的圖片索引"""
+    if image_index is None:
+        image_index = build_image_index(image_folder)
+    processed_rows = [process_row(row, image_index) for _, row in df.iterrows()]
     processed_df = pd.DataFrame(processed_rows)
     return processed_df
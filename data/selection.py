@@ -0,0 +1,195 @@
+# data/selection.py
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+
+# 上次生成的工作證指紋，用於查詢「自上次生成後有變更」的資料
+LAST_RUN_PATH = 'config/last_run.json'
+
+
+def normalize_id(value):
+    """將工作證號碼統一為字串，Excel 讀入的數字不帶小數點"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_minguo_date(date_str):
+    """將民國日期字串 (YYY.MM.DD) 轉為可排序的 (年, 月, 日)，格式錯誤時返回 None"""
+    try:
+        parts = str(date_str).strip().split('.')
+        if len(parts) != 3:
+            return None
+        return tuple(int(part) for part in parts)
+    except ValueError:
+        return None
+
+
+def row_fingerprint(row):
+    """計算單張工作證的指紋，內容或照片檔案變更時指紋隨之改變；row 可為 itertuples 的列"""
+    image_path = row.圖片路徑
+    try:
+        image_mtime = os.path.getmtime(image_path) if image_path else 0
+    except OSError:
+        image_mtime = 0
+    content = "|".join(str(value) for value in (row.公司名稱, row.姓名, row.工作證號碼, row.有效期限, row.圖片路徑))
+    return hashlib.sha1(f"{content}|{image_mtime}".encode('utf-8')).hexdigest()
+
+
+def prefilter_roster(df, ids=None, names=None, company=None):
+    """
+    在 process_data 之前，依工作證號碼、姓名、公司名稱縮小原始名冊，
+    只處理需要的列；有效期限與變更條件需處理後的欄位，之後再以 RosterIndex 篩選。
+    """
+    mask = None
+
+    def narrow(matched):
+        nonlocal mask
+        mask = matched if mask is None else mask & matched
+
+    if ids:
+        wanted = {normalize_id(value) for value in ids}
+        narrow(df['工作證號碼'].map(normalize_id).isin(wanted))
+    if names:
+        wanted = {str(name).strip() for name in names}
+        narrow(df['姓名'].astype(str).str.strip().isin(wanted))
+    if company:
+        narrow(df['公司名稱'].astype(str).str.strip() == str(company).strip())
+
+    if mask is None:
+        return df
+    return df[mask]
+
+
+def load_last_run(path=LAST_RUN_PATH):
+    """讀取上次生成的指紋記錄 {工作證號碼: 指紋}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"讀取上次生成記錄時出錯: {e}")
+        return {}
+
+
+def save_last_run(data, path=LAST_RUN_PATH):
+    """將本次生成的工作證指紋合併寫入記錄"""
+    fingerprints = load_last_run(path)
+    for row in data.itertuples(index=False):
+        fingerprints[normalize_id(row.工作證號碼)] = row_fingerprint(row)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, ensure_ascii=False, indent=4)
+
+
+class RosterIndex:
+    """
+    處理後名冊的查詢索引。
+
+    依工作證號碼、姓名、公司名稱建立雜湊索引，有效期限建立排序索引，
+    查詢結果以列位置表示，最後只取出符合的列交給 generate_pdf。
+    """
+    def __init__(self, data):
+        self.data = data.reset_index(drop=True)
+        self._by_id = defaultdict(list)
+        self._by_name = defaultdict(list)
+        self._by_company = defaultdict(list)
+        self._expiry_keys = []
+        self._expiry_positions = []
+
+        if self.data.empty:
+            return
+
+        expiry = []
+        for pos, row in enumerate(self.data.itertuples(index=False)):
+            self._by_id[normalize_id(row.工作證號碼)].append(pos)
+            self._by_name[str(row.姓名).strip()].append(pos)
+            self._by_company[str(row.公司名稱).strip()].append(pos)
+            key = parse_minguo_date(row.有效期限)
+            if key is not None:
+                expiry.append((key, pos))
+        expiry.sort()
+        self._expiry_keys = [key for key, _ in expiry]
+        self._expiry_positions = [pos for _, pos in expiry]
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def companies(self):
+        """所有公司名稱，已排序"""
+        return sorted(self._by_company)
+
+    def by_ids(self, ids):
+        return {pos for value in ids for pos in self._by_id.get(normalize_id(value), [])}
+
+    def by_names(self, names):
+        return {pos for name in names for pos in self._by_name.get(str(name).strip(), [])}
+
+    def by_company(self, company):
+        return set(self._by_company.get(str(company).strip(), []))
+
+    def by_expiry(self, start=None, end=None):
+        """有效期限介於 start 與 end (含) 之間，日期格式為民國 YYY.MM.DD，None 表示不限"""
+        lo = 0
+        hi = len(self._expiry_keys)
+        if start:
+            start_key = parse_minguo_date(start)
+            if start_key is None:
+                raise ValueError(f"日期格式不正確: {start}")
+            lo = bisect.bisect_left(self._expiry_keys, start_key)
+        if end:
+            end_key = parse_minguo_date(end)
+            if end_key is None:
+                raise ValueError(f"日期格式不正確: {end}")
+            hi = bisect.bisect_right(self._expiry_keys, end_key)
+        return set(self._expiry_positions[lo:hi])
+
+    def changed_since(self, fingerprints, positions=None):
+        """與上次生成記錄比較，返回新增或內容變更的列；positions 限定只檢查這些列"""
+        if positions is None:
+            positions = range(len(self.data))
+            rows = self.data.itertuples(index=False)
+        else:
+            positions = sorted(positions)
+            rows = self.data.iloc[positions].itertuples(index=False)
+        changed = set()
+        for pos, row in zip(positions, rows):
+            if fingerprints.get(normalize_id(row.工作證號碼)) != row_fingerprint(row):
+                changed.add(pos)
+        return changed
+
+    def select(self, ids=None, names=None, company=None, expiry_from=None, expiry_to=None, changed_only=False, last_run=None):
+        """
+        依條件篩選名冊，多個條件取交集；未指定任何條件時返回全部資料。
+        結果保持原始名冊順序。
+        """
+        positions = None
+
+        def narrow(matched):
+            nonlocal positions
+            positions = matched if positions is None else positions & matched
+
+        if ids:
+            narrow(self.by_ids(ids))
+        if names:
+            narrow(self.by_names(names))
+        if company:
+            narrow(self.by_company(company))
+        if expiry_from or expiry_to:
+            narrow(self.by_expiry(expiry_from, expiry_to))
+        if changed_only:
+            fingerprints = load_last_run() if last_run is None else last_run
+            # 已有其他條件時只對篩選後的列計算指紋
+            narrow(self.changed_since(fingerprints, positions))
+
+        if positions is None:
+            return self.data
+        selected = self.data.iloc[sorted(positions)].reset_index(drop=True)
+        logging.info(f"篩選結果: {len(selected)}/{len(self.data)} 張工作證")
+        return selected
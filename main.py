@@ -1,6 +1,7 @@
 # main.py
 
 import logging
+import multiprocessing
 import sys
 import tkinter as tk
 from ui.main_window import MainWindow
@@ -31,4 +32,10 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包為 EXE 後，點陣輸出的程序池需要此呼叫
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        # 帶參數時以命令列模式執行，不啟動 GUI
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
     main()
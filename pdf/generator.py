@@ -1,12 +1,52 @@
 # pdf/generator.py
 
 import fitz  # PyMuPDF
+import hashlib
 import logging
 import os
 from utils.resources import fit_text_in_box, generate_offsets
 
+# 保存 PDF 時的設定：garbage=4 會合併內容相同的串流，deflate 壓縮未壓縮的串流
+SAVE_OPTIONS = {
+    "garbage": 4,
+    "deflate": True,
+    "deflate_images": True,
+    "deflate_fonts": True,
+}
+
+def save_pdf(doc, pdf_filename):
+    """以去重及壓縮設定保存 PDF，並返回檔案大小 (位元組)"""
+    doc.save(pdf_filename, **SAVE_OPTIONS)
+    file_size = os.path.getsize(pdf_filename)
+    logging.info(f"PDF 檔案大小: {file_size / 1024:.1f} KB")
+    return file_size
+
+def insert_image_dedup(page, rect, image_path, image_xrefs):
+    """
+    依圖片內容雜湊插入圖片，相同內容只嵌入一次。
+    image_xrefs 為該輸出文件的 {雜湊: xref} 對照表，重複的圖片直接引用既有 xref。
+    返回因引用既有圖片而省下的位元組數，新嵌入的圖片返回 0。
+    """
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    digest = hashlib.sha1(image_bytes).hexdigest()
+
+    xref = image_xrefs.get(digest)
+    if xref:
+        page.insert_image(rect, xref=xref, keep_proportion=False)
+        return len(image_bytes)
+
+    image_xrefs[digest] = page.insert_image(rect, stream=image_bytes, keep_proportion=False)
+    return 0
+
+def open_template(template_pdf):
+    """開啟模板 PDF；已開啟的 fitz.Document 直接沿用"""
+    if isinstance(template_pdf, fitz.Document):
+        return template_pdf
+    return fitz.open(template_pdf)
+
 def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder, font_name, progress_callback, offset_x, offset_y, app=None):
-    """生成 PDF 的主要函數"""
+    """生成 PDF 的主要函數，模板可為檔案路徑或已開啟的 fitz.Document"""
     logging.info(f"開始生成工作證, 共 {len(data)} 張")
 
     # 定義頁面尺寸，假設 A4 頁面 (595 x 842 點)
@@ -15,7 +55,7 @@ def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder,
 
     # 載入模板 PDF
     try:
-        template_doc_front = fitz.open(template_pdf_front)
+        template_doc_front = open_template(template_pdf_front)
         front_page = template_doc_front.load_page(0)
         front_width, front_height = front_page.rect.width, front_page.rect.height
         logging.info(f"正面模板尺寸: {front_width:.2f} 點 × {front_height:.2f} 點")
@@ -24,7 +64,7 @@ def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder,
         return
 
     try:
-        template_doc_back = fitz.open(template_pdf_back)
+        template_doc_back = open_template(template_pdf_back)
         back_page = template_doc_back.load_page(0)
         back_width, back_height = back_page.rect.width, back_page.rect.height
         logging.info(f"背面模板尺寸: {back_width:.2f} 點 × {back_height:.2f} 點")
@@ -69,6 +109,11 @@ def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder,
     total_cards = len(data)
     total_pages = (total_cards + max_per_page - 1) // max_per_page  # 計算總頁數
 
+    # 圖片內容雜湊 -> xref 對照表，同一文件內重複的照片只嵌入一次
+    image_xrefs = {}
+    reused_images = 0
+    reused_bytes = 0
+
     for i in range(0, total_cards, max_per_page):
         if app and not app.is_generating:
             logging.info("生成過程被取消")
@@ -115,8 +160,13 @@ def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder,
             # 插入圖片
             try:
                 if row.圖片路徑:
-                    page_front.insert_image(image_rect, filename=row.圖片路徑, keep_proportion=False)
-                    logging.info(f"成功插入圖片，位置: {image_rect}")
+                    saved_bytes = insert_image_dedup(page_front, image_rect, row.圖片路徑, image_xrefs)
+                    if saved_bytes:
+                        reused_images += 1
+                        reused_bytes += saved_bytes
+                        logging.info(f"重複圖片，引用既有內容，位置: {image_rect}")
+                    else:
+                        logging.info(f"成功插入圖片，位置: {image_rect}")
                 else:
                     logging.warning(f"沒有提供圖片路徑，跳過插入圖片: {row.姓名}")
             except Exception as e:
@@ -175,3 +225,6 @@ def generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder,
     if total_pages % 2 != 0:
         page_back = doc.new_page(width=page_width, height=page_height)
         logging.info("添加一個空白頁，以確保雙面列印時頁面數量為偶數")
+
+    if reused_images:
+        logging.info(f"圖片去重: 嵌入 {len(image_xrefs)} 張, 重複引用 {reused_images} 次, 節省約 {reused_bytes / 1024:.1f} KB")
@@ -0,0 +1,177 @@
+# pdf/raster.py
+
+import fitz  # PyMuPDF
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from PIL import Image
+from pdf.generator import SAVE_OPTIONS
+from utils.progress import QueueProgress, drain_progress_queue
+
+# 支援的點陣輸出格式
+RASTER_FORMATS = ("png", "tiff", "pdf")
+
+# 每個子程序一次處理的頁數
+PAGES_PER_TASK = 4
+
+# 主程序檢查子程序進度的間隔 (秒)
+PROGRESS_POLL_INTERVAL = 0.1
+
+# 子程序內的進度計數器與取消旗標
+_worker_progress = None
+_worker_cancel = None
+
+
+def _init_worker(progress_queue, cancel_event):
+    """子程序初始化：建立本地累加、定時回報的進度計數器，並保存取消旗標"""
+    global _worker_progress, _worker_cancel
+    _worker_progress = QueueProgress(progress_queue)
+    _worker_cancel = cancel_event
+
+
+def _page_filename(output_dir, base_name, page_number, ext):
+    """依頁碼產生輸出檔名，正面為奇數頁、背面為偶數頁"""
+    side = "正" if page_number % 2 == 0 else "背"
+    return os.path.join(output_dir, f"{base_name}_{page_number + 1:04d}_{side}.{ext}")
+
+
+def _render_pages(pdf_path, page_numbers, output_dir, base_name, dpi, fmt):
+    """
+    子程序函數：獨立開啟 PDF，逐頁點陣化並立即寫入磁碟。
+    每次只保留一張 Pixmap，記憶體用量與頁數無關。
+    """
+    written = []
+    doc = fitz.open(pdf_path)
+    try:
+        for page_number in page_numbers:
+            if _worker_cancel is not None and _worker_cancel.is_set():
+                break
+            page = doc.load_page(page_number)
+            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            if fmt == "tiff":
+                path = _page_filename(output_dir, base_name, page_number, "tif")
+                image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+                image.save(path, format="TIFF", compression="tiff_lzw", dpi=(dpi, dpi))
+                image.close()
+            else:
+                # PNG 與點陣 PDF 的中間檔皆使用 PNG
+                path = _page_filename(output_dir, base_name, page_number, "png")
+                pix.set_dpi(dpi, dpi)
+                pix.save(path)
+            written.append((page_number, path))
+            pix = None
+            if _worker_progress:
+                _worker_progress()
+    finally:
+        doc.close()
+        if _worker_progress:
+            _worker_progress.flush()
+    return written
+
+
+def _assemble_raster_pdf(pdf_path, page_paths, output_pdf):
+    """
+    將逐頁 PNG 組合為純點陣 PDF，頁面尺寸沿用原始文件。
+    第一頁完整保存後，其餘每頁插入後立即增量保存 (仍壓縮新串流)，記憶體中只保留一頁的圖片。
+    """
+    source = fitz.open(pdf_path)
+    out = None
+    try:
+        for index, (page_number, path) in enumerate(page_paths):
+            if index == 0:
+                out = fitz.open()
+                out.set_metadata(source.metadata)
+            rect = source.load_page(page_number).rect
+            page = out.new_page(width=rect.width, height=rect.height)
+            page.insert_image(page.rect, filename=path)
+            if index == 0:
+                out.save(output_pdf, **SAVE_OPTIONS)
+                out.close()
+                out = fitz.open(output_pdf)
+            else:
+                # saveIncr() 不壓縮，需明確指定 deflate 以免頁面以原始像素保存
+                out.save(output_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+            os.remove(path)
+    finally:
+        if out is not None:
+            out.close()
+        source.close()
+    logging.info(f"PDF 檔案大小: {os.path.getsize(output_pdf) / 1024:.1f} KB")
+
+
+def export_raster(pdf_path, output_path, dpi=300, fmt="png", max_workers=None, progress_callback=None, is_cancelled=None):
+    """
+    將已生成的工作證 PDF 逐頁點陣化。
+
+    fmt 為 'png' 或 'tiff' 時，output_path 為輸出資料夾，每頁一個檔案；
+    fmt 為 'pdf' 時，output_path 為純點陣 PDF 的檔名。
+    頁面分批交由程序池處理，每個子程序各自開啟 PDF；子程序的進度累計後
+    定時回報，以 progress_callback(頁數) 通知。
+    is_cancelled() 返回 True 時停止點陣化，等待執行中的子程序結束後返回空列表。
+    返回輸出檔案路徑列表。
+    """
+    fmt = fmt.lower()
+    if fmt not in RASTER_FORMATS:
+        raise ValueError(f"不支援的點陣輸出格式: {fmt}")
+
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    if fmt == "pdf":
+        output_dir = os.path.splitext(output_path)[0] + "_pages"
+    else:
+        output_dir = output_path
+    os.makedirs(output_dir, exist_ok=True)
+
+    logging.info(f"開始點陣化 {page_count} 頁, DPI: {dpi}, 格式: {fmt.upper()}")
+
+    chunks = [list(range(start, min(start + PAGES_PER_TASK, page_count)))
+              for start in range(0, page_count, PAGES_PER_TASK)]
+
+    page_paths = []
+    cancelled = False
+    progress_queue = multiprocessing.Queue()
+    cancel_event = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(progress_queue, cancel_event)) as executor:
+        pending = {executor.submit(_render_pages, pdf_path, chunk, output_dir, base_name, dpi, fmt)
+                   for chunk in chunks}
+        while pending:
+            if is_cancelled is not None and is_cancelled():
+                # 通知執行中的子程序停止，取消尚未開始的工作，並等待子程序結束
+                cancelled = True
+                cancel_event.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                break
+            done, pending = wait(pending, timeout=PROGRESS_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            drain_progress_queue(progress_queue, progress_callback)
+            for future in done:
+                page_paths.extend(future.result())
+                logging.info(f"已點陣化 {len(page_paths)}/{page_count} 頁")
+    # 子程序結束前最後一次回報的進度
+    drain_progress_queue(progress_queue, progress_callback)
+    progress_queue.close()
+
+    if cancelled:
+        if fmt == "pdf":
+            # 點陣 PDF 的中間檔不再需要
+            for path in os.listdir(output_dir):
+                os.remove(os.path.join(output_dir, path))
+            os.rmdir(output_dir)
+        logging.info("點陣化已取消")
+        return []
+
+    page_paths.sort()
+
+    if fmt == "pdf":
+        _assemble_raster_pdf(pdf_path, page_paths, output_path)
+        try:
+            os.rmdir(output_dir)
+        except OSError:
+            pass
+        logging.info(f"成功保存點陣 PDF: {output_path}")
+        return [output_path]
+
+    logging.info(f"成功輸出點陣圖至: {output_dir}")
+    return [path for _, path in page_paths]
@@ -0,0 +1,329 @@
+# service/server.py
+
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import fitz  # PyMuPDF
+import pandas as pd
+from data.processing import REQUIRED_COLUMNS, process_data
+from pdf.generator import SAVE_OPTIONS, generate_pdf
+from utils.fonts import FONT_PATH
+from utils.resources import build_image_index, load_pillow_font, resource_path, sanitize_font_name
+
+# 回傳 PDF 時每次寫出的位元組數
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 請求內容大小上限 (位元組)
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# 子程序內常駐的模板文件
+_worker_templates = None
+
+
+def _init_worker(template_pdf_front, template_pdf_back):
+    """子程序初始化：開啟模板並預先載入字體，之後的請求直接使用"""
+    global _worker_templates
+    # 子程序只記錄警告以上，避免逐張工作證的日誌拖慢服務
+    logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_templates = (fitz.open(template_pdf_front), fitz.open(template_pdf_back))
+    try:
+        for size in range(5, 11):
+            load_pillow_font(FONT_PATH, size)
+    except IOError:
+        logging.error(f"無法載入字體檔案: {FONT_PATH}")
+
+
+def _render_badges(records, image_folder, font_name, offset_x, offset_y):
+    """子程序函數：以常駐的模板生成工作證，返回 PDF 位元組"""
+    template_doc_front, template_doc_back = _worker_templates
+    start = time.perf_counter()
+    doc = fitz.open()
+    try:
+        generate_pdf(doc, pd.DataFrame(records), template_doc_front, template_doc_back, image_folder, font_name, None, offset_x, offset_y)
+        pdf_bytes = doc.tobytes(**SAVE_OPTIONS)
+    finally:
+        doc.close()
+    return pdf_bytes, time.perf_counter() - start
+
+
+class ServiceBusy(Exception):
+    """等待中的請求已達上限"""
+
+
+class BadgeService:
+    """
+    常駐的工作證生成服務。
+
+    模板、字體與圖片索引只載入一次，請求交由固定大小的程序池生成，
+    超過 max_pending 的請求直接拒絕，避免無限排隊。名額在生成工作真正結束時
+    才釋放，逾時但仍在執行的工作繼續佔用名額。
+    """
+    def __init__(self, image_folder, offset_x=-1.8, offset_y=-1.6, max_workers=2, max_pending=16, timeout=120):
+        self.image_folder = image_folder
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.timeout = timeout
+        self.font_name = sanitize_font_name("kaiu")
+
+        template_pdf_front = resource_path("templates/工作證模板(正).pdf")
+        template_pdf_back = resource_path("templates/工作證模板(背).pdf")
+        if not os.path.exists(template_pdf_front) or not os.path.exists(template_pdf_back):
+            raise FileNotFoundError("模板 PDF 文件不存在。請確認 '工作證模板(正).pdf' 和 '工作證模板(背).pdf' 在 templates 目錄中。")
+
+        self._index_lock = threading.Lock()
+        self._image_index = None
+        self._image_folder_mtime = None
+        self._refresh_image_index()
+
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "cards": 0, "rejected": 0, "errors": 0, "in_flight": 0}
+
+        self.max_workers = max_workers
+        self._templates = (template_pdf_front, template_pdf_back)
+        self._executor_lock = threading.Lock()
+        self.executor = self._create_executor()
+        logging.info(f"工作證服務已就緒, 子程序數: {max_workers}, 等待上限: {max_pending}")
+
+    def _create_executor(self):
+        """建立程序池，並讓子程序在第一個請求前完成初始化"""
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=self._templates
+        )
+        for future in [executor.submit(len, ()) for _ in range(self.max_workers)]:
+            future.result()
+        return executor
+
+    def _restart_executor(self, broken):
+        """子程序異常終止導致程序池損壞時，以新的程序池取代"""
+        with self._executor_lock:
+            if self.executor is not broken:
+                return  # 已由其他請求重建
+            logging.warning("生成程序池已損壞，重新建立")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._create_executor()
+
+    def _submit(self, records):
+        """提交生成工作；程序池已損壞時重建後重試一次"""
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                future = executor.submit(_render_badges, records, self.image_folder, self.font_name, self.offset_x, self.offset_y)
+                return future, executor
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                self._restart_executor(executor)
+
+    def _release_slot(self, future):
+        """生成工作結束 (完成、失敗或取消) 時釋放名額"""
+        self._update_stats(in_flight=-1)
+        self._pending.release()
+
+    def _refresh_image_index(self):
+        """圖片資料夾有變動時重建圖片索引"""
+        mtime = os.path.getmtime(self.image_folder)
+        with self._index_lock:
+            if mtime != self._image_folder_mtime:
+                self._image_index = build_image_index(self.image_folder)
+                self._image_folder_mtime = mtime
+                logging.info(f"已建立圖片索引, 共 {len(self._image_index)} 張")
+            return self._image_index
+
+    def _update_stats(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def render(self, rows):
+        """
+        以名冊資料 (與 Excel 相同欄位) 生成工作證 PDF。
+        返回 (PDF 位元組, 計時資訊)。
+        """
+        if not rows:
+            raise ValueError("沒有可生成的數據")
+        df = pd.DataFrame(rows)
+        missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"缺少必要的欄位: {missing}")
+
+        if not self._pending.acquire(blocking=False):
+            self._update_stats(rejected=1)
+            raise ServiceBusy("等待中的請求過多，請稍後再試")
+        self._update_stats(requests=1, in_flight=1)
+        try:
+            received = time.perf_counter()
+            data = process_data(df, self.image_folder, self._refresh_image_index())
+            records = data.to_dict(orient="records")
+            future, executor = self._submit(records)
+        except Exception:
+            self._update_stats(errors=1, in_flight=-1)
+            self._pending.release()
+            raise
+        future.add_done_callback(self._release_slot)
+
+        try:
+            pdf_bytes, render_seconds = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # 尚未開始的工作直接取消；已在執行的工作完成前仍佔用名額
+            future.cancel()
+            self._update_stats(errors=1)
+            raise
+        except BrokenProcessPool:
+            self._update_stats(errors=1)
+            self._restart_executor(executor)
+            raise
+        except Exception:
+            self._update_stats(errors=1)
+            raise
+        total_seconds = time.perf_counter() - received
+        self._update_stats(cards=len(records))
+
+        timing = {
+            "cards": len(records),
+            "render_ms": round(render_seconds * 1000, 1),
+            "queue_ms": round(max(total_seconds - render_seconds, 0) * 1000, 1),
+            "total_ms": round(total_seconds * 1000, 1),
+        }
+        logging.info(f"生成 {timing['cards']} 張工作證, 排隊 {timing['queue_ms']} ms, 生成 {timing['render_ms']} ms")
+        return pdf_bytes, timing
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class BadgeRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /badges: 內容為名冊資料的 JSON 陣列，或 {"rows": [...]}，回傳 PDF。
+    GET /health: 回傳服務狀態。
+    """
+    service = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        with self.service._stats_lock:
+            stats = dict(self.service.stats)
+        self._send_json(200, {"status": "ok", **stats})
+
+    def do_POST(self):
+        if self.path != "/badges":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_json(400, {"error": "Content-Length 不正確"})
+            return
+        if length < 0:
+            self._send_json(400, {"error": "Content-Length 不正確"})
+            return
+        if length > MAX_BODY_BYTES:
+            # 不讀取過大的內容，直接關閉連線
+            self.close_connection = True
+            self._send_json(413, {"error": f"請求內容超過上限 {MAX_BODY_BYTES} 位元組"})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+            rows = payload.get("rows") if isinstance(payload, dict) else payload
+            pdf_bytes, timing = self.service.render(rows)
+        except ServiceBusy as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except FutureTimeoutError:
+            self._send_json(504, {"error": "生成工作證逾時"})
+            return
+        except BrokenProcessPool:
+            self._send_json(503, {"error": "生成程序異常終止，已重新啟動，請再試一次"})
+            return
+        except Exception as e:
+            logging.error(f"生成工作證時出錯: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(pdf_bytes)))
+        self.send_header("X-Card-Count", str(timing["cards"]))
+        self.send_header("X-Queue-Time-Ms", str(timing["queue_ms"]))
+        self.send_header("X-Render-Time-Ms", str(timing["render_ms"]))
+        self.send_header("X-Total-Time-Ms", str(timing["total_ms"]))
+        self.end_headers()
+        view = memoryview(pdf_bytes)
+        for start in range(0, len(view), STREAM_CHUNK_SIZE):
+            self.wfile.write(view[start:start + STREAM_CHUNK_SIZE])
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+def check_loopback(host):
+    """
+    服務只允許綁定在本機位址，其他位址拋出 ValueError。
+    支援 IPv4 與 IPv6 (如 ::1)，返回解析出的位址族。
+    """
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        addresses = [(family, ipaddress.ip_address(sockaddr[0].split("%")[0])) for family, _, _, _, sockaddr in infos]
+    except (OSError, ValueError):
+        raise ValueError(f"無法解析綁定位址: {host}")
+    # 任一解析結果不是本機位址都拒絕
+    if not addresses or not all(address.is_loopback for _, address in addresses):
+        raise ValueError(f"工作證服務只能綁定本機位址，不接受: {host}")
+    return addresses[0][0]
+
+
+class BadgeHTTPServer(ThreadingHTTPServer):
+    """依綁定位址選擇 IPv4 或 IPv6 的 HTTP 服務"""
+    def __init__(self, server_address, handler, address_family=socket.AF_INET):
+        self.address_family = address_family
+        super().__init__(server_address, handler)
+
+
+def create_server(service, host="127.0.0.1", port=8765):
+    """建立綁定在本機的 HTTP 服務；port 為 0 時由系統分配"""
+    address_family = check_loopback(host)
+    handler = type("BoundBadgeRequestHandler", (BadgeRequestHandler,), {"service": service})
+    return BadgeHTTPServer((host, port), handler, address_family)
+
+
+def serve(image_folder, host="127.0.0.1", port=8765, max_workers=2, max_pending=16, offset_x=-1.8, offset_y=-1.6):
+    """啟動工作證服務並持續執行，直到 Ctrl+C"""
+    check_loopback(host)
+    service = BadgeService(image_folder, offset_x, offset_y, max_workers=max_workers, max_pending=max_pending)
+    server = create_server(service, host, port)
+    address, port = server.server_address[:2]
+    if server.address_family == socket.AF_INET6:
+        address = f"[{address}]"
+    logging.info(f"工作證服務啟動於 http://{address}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("工作證服務停止")
+    finally:
+        server.server_close()
+        service.close()
@@ -9,13 +9,25 @@ import json
 import os
 import threading
 import queue
-from data.processing import process_data
-from pdf.generator import generate_pdf
+from data.processing import iter_process_data, read_roster
+from data.selection import RosterIndex, save_last_run
+from pdf.generator import generate_pdf, save_pdf
+from pdf.raster import export_raster
 from utils.resources import resource_path, sanitize_font_name
 from utils.fonts import FONT_PATH
 from ui.log_handler import TextHandler
+from utils.progress import ProgressReporter, ProgressUpdate, format_progress
+from ui.thumbnails import ThumbnailCache, THUMBNAIL_CACHE_DIR, THUMBNAIL_DISK_CACHE_MB, THUMBNAIL_SIZE
 import fitz  # PyMuPDF
 
+# 介面選項對應的點陣輸出格式，None 表示只輸出向量 PDF
+OUTPUT_FORMATS = {
+    "PDF": None,
+    "PNG": "png",
+    "TIFF": "tiff",
+    "點陣 PDF": "pdf",
+}
+
 class MainWindow:
     """工作證生成器主應用程式"""
     def __init__(self, root):
@@ -36,7 +48,26 @@ class MainWindow:
         self.excel_file = tk.StringVar()
         self.image_folder = tk.StringVar()
         self.pdf_filename = tk.StringVar(value="workpasses_double_sided.pdf")
+        self.output_format = tk.StringVar(value="PDF")
+        self.raster_dpi = tk.IntVar(value=300)
         self.data = pd.DataFrame()
+        self.roster_index = RosterIndex(self.data)
+        self.selected_data = self.data
+
+        # 篩選條件變數
+        self.filter_ids = tk.StringVar()
+        self.filter_company = tk.StringVar()
+        self.filter_expiry_from = tk.StringVar()
+        self.filter_expiry_to = tk.StringVar()
+        self.filter_changed = tk.BooleanVar()
+
+        # 照片縮圖
+        self.show_thumbnails = tk.BooleanVar(value=False)
+        self.thumbnail_disk_cache = False  # 是否啟用縮圖磁碟快取，由 config.json 設定
+        self.thumbnail_disk_cache_mb = THUMBNAIL_DISK_CACHE_MB
+        self._thumbnail_items = {}  # 目前顯示縮圖的項目 -> PhotoImage
+        self._thumbnail_update_job = None
+        self._thumbnail_poll_job = None
 
         # 手動偏移量變數
         self.offset_x = tk.DoubleVar()
@@ -45,13 +76,28 @@ class MainWindow:
         # 加載設定
         self.load_settings()
 
+        self.thumbnail_cache = ThumbnailCache(
+            disk_cache_dir=THUMBNAIL_CACHE_DIR if self.thumbnail_disk_cache else None,
+            disk_cache_bytes=self.thumbnail_disk_cache_mb * 1024 * 1024
+        )
+
         # 設置進度隊列
         self.queue = queue.Queue()
         self.progress_var = tk.DoubleVar()
         self.is_generating = False  # 用於判斷是否正在生成
 
+        # 背景載入數據，新的載入會取代進行中的載入
+        self.load_queue = queue.Queue()
+        self._load_generation = 0
+        self._load_cancel = None
+        self._load_chunks = []
+        self._load_total = 0
+        self._load_poll_job = None
+        self.is_loading = False
+
         # 設置 UI 元素
         self.setup_ui()
+        self.toggle_thumbnails()
 
         # 設置日誌處理器
         self.setup_logging()
@@ -59,6 +105,8 @@ class MainWindow:
         # 視窗置中
         self.center_window()
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def center_window(self):
         """將視窗置中"""
         self.root.update_idletasks()
@@ -106,10 +154,18 @@ class MainWindow:
         frame_preview = ttk.Frame(self.root, padding="10")
         frame_preview.grid(row=3, column=0, sticky="NSEW", padx=5, pady=5)
 
-        ttk.Label(frame_preview, text="預覽:", font=entry_font).grid(row=0, column=0, sticky="W")
+        # 預覽標題列：標題、載入狀態、縮圖開關
+        frame_preview_header = ttk.Frame(frame_preview)
+        frame_preview_header.grid(row=0, column=0, sticky="EW")
+        frame_preview_header.grid_columnconfigure(1, weight=1)
+
+        ttk.Label(frame_preview_header, text="預覽:", font=entry_font).grid(row=0, column=0, sticky="W")
+        self.load_status_label = ttk.Label(frame_preview_header, text="", font=entry_font)
+        self.load_status_label.grid(row=0, column=1, sticky="W", padx=5)
+        ttk.Checkbutton(frame_preview_header, text="顯示照片縮圖", variable=self.show_thumbnails, command=self.toggle_thumbnails).grid(row=0, column=2, sticky="E")
 
         # 增加水平和垂直滾動條
-        tree_scroll_y = ttk.Scrollbar(frame_preview, orient="vertical")
+        self.tree_scroll_y = tree_scroll_y = ttk.Scrollbar(frame_preview, orient="vertical")
         tree_scroll_x = ttk.Scrollbar(frame_preview, orient="horizontal")
 
         self.tree = ttk.Treeview(
@@ -117,7 +173,7 @@ class MainWindow:
             columns=("公司名稱", "姓名", "工作證號碼", "有效期限", "圖片路徑"),
             show='headings',
             height=10,
-            yscrollcommand=tree_scroll_y.set,
+            yscrollcommand=self.on_tree_scroll,
             xscrollcommand=tree_scroll_x.set
         )
         self.tree.grid(row=1, column=0, sticky="NSEW")
@@ -126,6 +182,12 @@ class MainWindow:
         style = ttk.Style()
         style.configure("Treeview", font=tree_font)  # 設定內容字體
         style.configure("Treeview.Heading", font=heading_font)  # 設定標題字體
+        style.configure("Thumbnail.Treeview", font=tree_font, rowheight=THUMBNAIL_SIZE[1] + 4)  # 顯示縮圖時的列高
+
+        # 縮圖欄位，只在顯示縮圖時出現
+        self.tree.heading("#0", text="照片")
+        self.tree.column("#0", width=THUMBNAIL_SIZE[0] + 20, stretch=False, anchor='center')
+        self.tree.bind("<Configure>", self.schedule_thumbnail_update)
 
         # 配置滾動條
         tree_scroll_y.config(command=self.tree.yview)
@@ -150,6 +212,26 @@ class MainWindow:
         self.tree.heading("圖片路徑", text="圖片路徑")
         self.tree.column("圖片路徑", width=200, anchor='center')  # 增加寬度以顯示完整路徑
 
+        # 篩選條件，用於只重印部分工作證
+        frame_filter = ttk.Frame(frame_preview, padding=(0, 5))
+        frame_filter.grid(row=3, column=0, sticky="W")
+
+        ttk.Label(frame_filter, text="工作證號碼:", font=entry_font).grid(row=0, column=0, sticky="W")
+        ttk.Entry(frame_filter, textvariable=self.filter_ids, width=20, font=entry_font).grid(row=0, column=1, padx=5)
+        ttk.Label(frame_filter, text="公司:", font=entry_font).grid(row=0, column=2, sticky="W")
+        self.company_combo = ttk.Combobox(frame_filter, textvariable=self.filter_company, state='readonly', width=15, font=entry_font)
+        self.company_combo.grid(row=0, column=3, padx=5)
+        ttk.Checkbutton(frame_filter, text="僅上次生成後變更", variable=self.filter_changed).grid(row=0, column=4, padx=5)
+
+        ttk.Label(frame_filter, text="有效期限:", font=entry_font).grid(row=1, column=0, sticky="W")
+        frame_expiry = ttk.Frame(frame_filter)
+        frame_expiry.grid(row=1, column=1, sticky="W", padx=5)
+        ttk.Entry(frame_expiry, textvariable=self.filter_expiry_from, width=10, font=entry_font).grid(row=0, column=0, sticky="W")
+        ttk.Label(frame_expiry, text="至", font=entry_font).grid(row=0, column=1, padx=5)
+        ttk.Entry(frame_expiry, textvariable=self.filter_expiry_to, width=10, font=entry_font).grid(row=0, column=2, sticky="W")
+        ttk.Button(frame_filter, text="篩選", command=self.apply_filter).grid(row=1, column=3, sticky="E")
+        ttk.Button(frame_filter, text="清除", command=self.clear_filter).grid(row=1, column=4, sticky="W", padx=5)
+
         # PDF 檔名
         frame_pdf = ttk.Frame(self.root, padding="10")
         frame_pdf.grid(row=4, column=0, sticky="W", padx=5, pady=5)
@@ -158,6 +240,14 @@ class MainWindow:
         ttk.Entry(frame_pdf, textvariable=self.pdf_filename, width=50, font=entry_font).grid(row=0, column=1, padx=5)
         ttk.Button(frame_pdf, text="選擇保存位置", command=self.select_pdf_filename).grid(row=0, column=2)
 
+        # 輸出格式：向量 PDF 或點陣化的 PNG/TIFF/點陣 PDF
+        ttk.Label(frame_pdf, text="輸出格式:", font=entry_font).grid(row=1, column=0, sticky="W", pady=5)
+        frame_format = ttk.Frame(frame_pdf)
+        frame_format.grid(row=1, column=1, sticky="W", padx=5)
+        ttk.Combobox(frame_format, textvariable=self.output_format, values=list(OUTPUT_FORMATS), state='readonly', width=10, font=entry_font).grid(row=0, column=0, sticky="W")
+        ttk.Label(frame_format, text="DPI:", font=entry_font).grid(row=0, column=1, sticky="W", padx=(10, 5))
+        ttk.Combobox(frame_format, textvariable=self.raster_dpi, values=[300, 600], state='readonly', width=6, font=entry_font).grid(row=0, column=2, sticky="W")
+
         # 進度條
         frame_progress = ttk.Frame(self.root, padding="10")
         frame_progress.grid(row=5, column=0, sticky="W", padx=5, pady=5)
@@ -232,42 +322,247 @@ class MainWindow:
             self.pdf_filename.set(file_path)
 
     def load_data(self):
-        """加載並處理數據"""
+        """在背景線程加載並處理數據，進行中的載入會被取消"""
         excel_path = self.excel_file.get()
         image_folder = self.image_folder.get()
 
         if not excel_path or not image_folder:
             return
 
+        # 取消進行中的載入，其尚未處理的訊息會因世代不符而被丟棄
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        self._load_generation += 1
+        self._load_cancel = threading.Event()
+        self._load_chunks = []
+        self.is_loading = True
+
+        self.data = pd.DataFrame()
+        self.roster_index = RosterIndex(self.data)
+        self.selected_data = self.data
+        self.refresh_preview(self.data)
+        # 舊名冊的縮圖不再需要，失敗記錄也一併清除以便重試
+        self.thumbnail_cache.clear()
+        self.load_status_label.config(text="載入中...")
+
+        threading.Thread(
+            target=self.load_data_thread,
+            args=(self._load_generation, self._load_cancel, excel_path, image_folder),
+            daemon=True
+        ).start()
+
+        if self._load_poll_job is None:
+            self._load_poll_job = self.root.after(50, self.process_load_queue)
+
+    def load_data_thread(self, generation, cancel_event, excel_path, image_folder):
+        """數據載入線程函數，分批將結果放入 load_queue"""
         try:
-            df = pd.read_excel(excel_path, engine='openpyxl')
-            required_columns = ['公司名稱', '姓名', '工作證號碼', '訓練日期']
-            if not all(col in df.columns for col in required_columns):
-                messagebox.showerror("錯誤", f"Excel 文件缺少必要的欄位: {required_columns}")
+            df = read_roster(excel_path)
+            if cancel_event.is_set():
                 return
-
-            self.data = process_data(df, image_folder)
-
-            # 更新預覽
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            for _, row in self.data.iterrows():
-                self.tree.insert("", "end", values=tuple(row))
-
-            logging.info("數據加載並預處理完成")
+            self.load_queue.put((generation, "start", len(df)))
+            for chunk in iter_process_data(df, image_folder, cancel_event=cancel_event):
+                self.load_queue.put((generation, "chunk", chunk))
+            if not cancel_event.is_set():
+                self.load_queue.put((generation, "done", None))
         except Exception as e:
             logging.error(f"加載數據時出錯: {e}")
-            messagebox.showerror("錯誤", f"加載數據時出錯: {e}")
+            self.load_queue.put((generation, "error", e))
+
+    def process_load_queue(self):
+        """在主線程逐批套用載入結果，每次只處理一批以保持介面回應"""
+        self._load_poll_job = None
+        try:
+            while True:
+                generation, kind, payload = self.load_queue.get_nowait()
+                if generation != self._load_generation:
+                    continue  # 已被新的載入取代
+                if kind == "start":
+                    self._load_total = payload
+                    self.load_status_label.config(text=f"載入中 0/{payload}")
+                elif kind == "chunk":
+                    self._load_chunks.append(payload)
+                    for _, row in payload.iterrows():
+                        self.tree.insert("", "end", values=tuple(row))
+                    loaded = sum(len(chunk) for chunk in self._load_chunks)
+                    self.load_status_label.config(text=f"載入中 {loaded}/{self._load_total}")
+                    self.schedule_thumbnail_update()
+                    break
+                elif kind == "done":
+                    self.finish_load_data()
+                elif kind == "error":
+                    # 清除已逐批顯示的部分資料，避免預覽與 self.data 不一致
+                    self.is_loading = False
+                    self._load_chunks = []
+                    self.refresh_preview(pd.DataFrame())
+                    self.load_status_label.config(text="")
+                    if isinstance(payload, ValueError):
+                        messagebox.showerror("錯誤", str(payload))
+                    else:
+                        messagebox.showerror("錯誤", f"加載數據時出錯: {payload}")
+        except queue.Empty:
+            pass
+        finally:
+            if self.is_loading or not self.load_queue.empty():
+                self._load_poll_job = self.root.after(10, self.process_load_queue)
+
+    def finish_load_data(self):
+        """所有批次載入完成後建立索引並套用篩選條件"""
+        self.is_loading = False
+        self.data = pd.concat(self._load_chunks, ignore_index=True) if self._load_chunks else pd.DataFrame()
+        self._load_chunks = []
+        self.roster_index = RosterIndex(self.data)
+        self.company_combo['values'] = [""] + self.roster_index.companies
+        self.load_status_label.config(text=f"共 {len(self.data)} 筆")
+
+        # 預覽已逐批顯示全部資料，有篩選條件時才需重新整理
+        if self.has_active_filter():
+            self.apply_filter()
+        else:
+            self.selected_data = self.data
+
+        logging.info("數據加載並預處理完成")
+
+    def refresh_preview(self, data):
+        """以指定資料更新預覽表格"""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        for _, row in data.iterrows():
+            self.tree.insert("", "end", values=tuple(row))
+        self._thumbnail_items.clear()
+        self.schedule_thumbnail_update()
+
+    def on_tree_scroll(self, first, last):
+        """預覽表格捲動時更新捲軸，並更新可見列的縮圖"""
+        self.tree_scroll_y.set(first, last)
+        self.schedule_thumbnail_update()
+
+    def toggle_thumbnails(self):
+        """切換是否顯示照片縮圖"""
+        if self.show_thumbnails.get():
+            self.tree.configure(show='tree headings', style="Thumbnail.Treeview")
+            self.schedule_thumbnail_update()
+        else:
+            self.tree.configure(show='headings', style="Treeview")
+            for item in self._thumbnail_items:
+                if self.tree.exists(item):
+                    self.tree.item(item, image='')
+            self._thumbnail_items.clear()
+            self.thumbnail_cache.set_wanted(())
+
+    def schedule_thumbnail_update(self, event=None):
+        """合併短時間內的多次捲動，只更新一次縮圖"""
+        if self._thumbnail_update_job is None:
+            self._thumbnail_update_job = self.root.after(50, self.update_thumbnails)
+
+    def visible_tree_items(self):
+        """返回目前畫面上可見的預覽列"""
+        items = []
+        step = max((THUMBNAIL_SIZE[1] + 4) // 2, 1)
+        for y in range(0, self.tree.winfo_height(), step):
+            item = self.tree.identify_row(y)
+            if item and item not in items:
+                items.append(item)
+        return items
+
+    def update_thumbnails(self):
+        """只為可見列顯示縮圖，未快取的縮圖交由背景線程解碼"""
+        self._thumbnail_update_job = None
+        if not self.show_thumbnails.get():
+            return
+
+        paths = {item: self.tree.set(item, "圖片路徑") for item in self.visible_tree_items()}
+        self.thumbnail_cache.set_wanted(paths.values())
+
+        # 釋放已離開畫面的縮圖
+        for item in list(self._thumbnail_items):
+            if item not in paths:
+                if self.tree.exists(item):
+                    self.tree.item(item, image='')
+                del self._thumbnail_items[item]
+
+        for item, path in paths.items():
+            if not path or item in self._thumbnail_items:
+                continue
+            photo = self.thumbnail_cache.get(path)
+            if photo:
+                self.tree.item(item, image=photo)
+                self._thumbnail_items[item] = photo
+            else:
+                self.thumbnail_cache.request(path)
+
+        if self.thumbnail_cache.pending and self._thumbnail_poll_job is None:
+            self._thumbnail_poll_job = self.root.after(30, self.poll_thumbnails)
+
+    def poll_thumbnails(self):
+        """取出背景線程的結果；有任何結果 (含略過與失敗) 都重新檢查可見列"""
+        self._thumbnail_poll_job = None
+        if self.thumbnail_cache.poll() > 0:
+            self.update_thumbnails()
+        elif self.thumbnail_cache.pending:
+            self._thumbnail_poll_job = self.root.after(30, self.poll_thumbnails)
+
+    def on_close(self):
+        """關閉視窗時停止背景載入與縮圖解碼"""
+        if self._load_cancel is not None:
+            self._load_cancel.set()
+        self.thumbnail_cache.close()
+        self.root.destroy()
+
+    def apply_filter(self):
+        """依篩選條件選出要生成的工作證"""
+        if self.is_loading:
+            return  # 載入完成後會自動套用篩選條件
+        ids = self.filter_ids.get().replace("，", ",").replace(",", " ").split()
+        try:
+            self.selected_data = self.roster_index.select(
+                ids=ids,
+                company=self.filter_company.get(),
+                expiry_from=self.filter_expiry_from.get().strip(),
+                expiry_to=self.filter_expiry_to.get().strip(),
+                changed_only=self.filter_changed.get()
+            )
+        except ValueError as e:
+            messagebox.showerror("錯誤", f"篩選條件錯誤: {e}")
+            return
+        self.refresh_preview(self.selected_data)
+
+    def has_active_filter(self):
+        """是否設定了任何篩選條件"""
+        return any((
+            self.filter_ids.get().strip(),
+            self.filter_company.get(),
+            self.filter_expiry_from.get().strip(),
+            self.filter_expiry_to.get().strip(),
+            self.filter_changed.get()
+        ))
+
+    def clear_filter(self):
+        """清除篩選條件，顯示全部資料"""
+        self.filter_ids.set("")
+        self.filter_company.set("")
+        self.filter_expiry_from.set("")
+        self.filter_expiry_to.set("")
+        self.filter_changed.set(False)
+        self.apply_filter()
 
     def start_generate_pdf(self):
         """開始生成 PDF"""
-        if self.data.empty:
-            messagebox.showwarning("警告", "沒有可生成的數據。請確認已選擇 Excel 文件和圖片資料夾。")
+        if self.is_loading:
+            messagebox.showwarning("警告", "數據仍在載入中，請稍候。")
+            return
+
+        if self.selected_data.empty:
+            messagebox.showwarning("警告", "沒有可生成的數據。請確認已選擇 Excel 文件和圖片資料夾，或調整篩選條件。")
             return
 
         if self.is_generating:
             return  # 已經在生成中，防止重複點擊
 
+        if hasattr(self, 'thread') and self.thread.is_alive():
+            messagebox.showwarning("警告", "上一次生成仍在停止中，請稍候再試。")
+            return
+
         pdf_filename = self.pdf_filename.get()
         if not pdf_filename.endswith(".pdf"):
             pdf_filename += ".pdf"
@@ -293,7 +588,7 @@ class MainWindow:
         self.doc = fitz.open()
 
         # 設置進度條
-        total_steps = len(self.data) * 2  # 正面和背面
+        total_steps = len(self.selected_data) * 2  # 正面和背面
         self.progress_var.set(0)
         self.progress_bar['maximum'] = total_steps
 
@@ -301,16 +596,26 @@ class MainWindow:
         offset_x = self.offset_x.get()
         offset_y = self.offset_y.get()
 
-        # 定義進度更新回調
-        def progress_callback():
-            self.queue.put(1)
+        # 清除上次生成殘留的訊息
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        # 進度回報器：生成迴圈只累加計數，每 0.1 秒才送出一次進度更新
+        progress_callback = ProgressReporter(self.queue.put, total=total_steps, stage="生成工作證", unit="面")
+
+        # 點陣輸出設定
+        raster_format = OUTPUT_FORMATS.get(self.output_format.get())
+        raster_dpi = self.raster_dpi.get()
 
         # 開始 PDF 生成的線程
         self.is_generating = True
         self.generate_button.config(state='disabled')
         self.cancel_button.config(state='normal')
         self.thread = threading.Thread(target=self.generate_pdf_thread, args=(
-            self.doc, self.data, template_pdf_front, template_pdf_back, self.image_folder.get(), font_name, pdf_filename, progress_callback, offset_x, offset_y))
+            self.doc, self.selected_data, template_pdf_front, template_pdf_back, self.image_folder.get(), font_name, pdf_filename, progress_callback, offset_x, offset_y, raster_format, raster_dpi))
         self.thread.start()
 
         # 開始檢查進度
@@ -330,17 +635,33 @@ class MainWindow:
                 if hasattr(self, 'doc'):
                     self.doc.close()
 
-    def generate_pdf_thread(self, doc, data, template_pdf_front, template_pdf_back, image_folder, font_name, pdf_filename, progress_callback, offset_x, offset_y):
+    def generate_pdf_thread(self, doc, data, template_pdf_front, template_pdf_back, image_folder, font_name, pdf_filename, progress_callback, offset_x, offset_y, raster_format=None, raster_dpi=300):
         """PDF 生成線程函數"""
         try:
             generate_pdf(doc, data, template_pdf_front, template_pdf_back, image_folder, font_name, progress_callback, offset_x, offset_y, self)
             # 將檔名設置到 PDF metadata
             doc.set_metadata({"title": os.path.basename(pdf_filename)})
+            progress_callback.finish()
+            page_count = doc.page_count
             if self.is_generating:
-                doc.save(pdf_filename)
+                save_pdf(doc, pdf_filename)
                 logging.info(f"成功保存 PDF 工作證文件: {pdf_filename}")
-                self.queue.put("done")
             doc.close()
+            if self.is_generating and raster_format:
+                # 點陣化已保存的 PDF，供無法處理大量向量物件的印表機使用
+                base = os.path.splitext(pdf_filename)[0]
+                if raster_format == "pdf":
+                    raster_output = f"{base}_raster.pdf"
+                else:
+                    raster_output = f"{base}_{raster_format}"
+                progress_callback.set_stage("點陣化", total=page_count, unit="頁")
+                export_raster(pdf_filename, raster_output, dpi=raster_dpi, fmt=raster_format,
+                              progress_callback=progress_callback, is_cancelled=lambda: not self.is_generating)
+                progress_callback.finish()
+            if self.is_generating:
+                # 記錄本次生成的工作證，供「僅上次生成後變更」篩選使用
+                save_last_run(data)
+                self.queue.put("done")
             # 保存設定
             self.save_settings()
         except Exception as e:
@@ -354,11 +675,10 @@ class MainWindow:
         try:
             while True:
                 msg = self.queue.get_nowait()
-                if isinstance(msg, int):
-                    current_progress = self.progress_var.get() + msg
-                    self.progress_var.set(current_progress)
-                    percentage = int((current_progress / self.progress_bar['maximum']) * 100)
-                    self.progress_label.config(text=f"{percentage}%")
+                if isinstance(msg, ProgressUpdate):
+                    self.progress_bar['maximum'] = max(msg.total, 1)
+                    self.progress_var.set(msg.done)
+                    self.progress_label.config(text=format_progress(msg))
                 elif isinstance(msg, str):
                     if msg == "done":
                         messagebox.showinfo("成功", f"成功生成 PDF 工作證文件: {self.pdf_filename.get()}")
@@ -385,6 +705,11 @@ class MainWindow:
                 config = json.load(f)
                 self.offset_x.set(config.get('offset_x', -1.8))
                 self.offset_y.set(config.get('offset_y', -1.6))
+                self.output_format.set(config.get('output_format', "PDF"))
+                self.raster_dpi.set(config.get('raster_dpi', 300))
+                self.show_thumbnails.set(config.get('show_thumbnails', False))
+                self.thumbnail_disk_cache = config.get('thumbnail_disk_cache', False)
+                self.thumbnail_disk_cache_mb = config.get('thumbnail_disk_cache_mb', THUMBNAIL_DISK_CACHE_MB)
         else:
             self.offset_x.set(-1.8)
             self.offset_y.set(-1.6)
@@ -395,7 +720,12 @@ class MainWindow:
             os.makedirs('config')
         config = {
             'offset_x': self.offset_x.get(),
-            'offset_y': self.offset_y.get()
+            'offset_y': self.offset_y.get(),
+            'output_format': self.output_format.get(),
+            'raster_dpi': self.raster_dpi.get(),
+            'show_thumbnails': self.show_thumbnails.get(),
+            'thumbnail_disk_cache': self.thumbnail_disk_cache,
+            'thumbnail_disk_cache_mb': self.thumbnail_disk_cache_mb
         }
         with open('config/config.json', 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=4)
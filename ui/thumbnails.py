@@ -0,0 +1,199 @@
+# ui/thumbnails.py
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+
+# 縮圖尺寸 (像素)
+THUMBNAIL_SIZE = (48, 48)
+
+# 記憶體快取上限 (位元組)
+THUMBNAIL_CACHE_BYTES = 32 * 1024 * 1024
+
+# 縮圖磁碟快取目錄與大小上限 (MB)
+THUMBNAIL_CACHE_DIR = 'cache/thumbnails'
+THUMBNAIL_DISK_CACHE_MB = 100
+
+
+def prune_disk_cache(cache_dir, max_bytes):
+    """磁碟快取超過上限時，從最久未使用的縮圖開始刪除"""
+    try:
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    except FileNotFoundError:
+        return
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return
+    removed = 0
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+        if total <= max_bytes:
+            break
+    logging.info(f"已清理縮圖快取 {removed} 個檔案")
+
+
+def file_mtime(path):
+    """返回檔案修改時間，檔案不存在時返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE, disk_cache_dir=None):
+    """
+    解碼並縮小圖片。JPEG 透過 draft 模式在解碼時直接降採樣，不需解出完整尺寸。
+    有磁碟快取時以 路徑+修改時間 為鍵，照片更新後自動失效。
+    """
+    stat = os.stat(path)
+    cache_path = None
+    if disk_cache_dir:
+        key = hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size}".encode('utf-8')).hexdigest()
+        cache_path = os.path.join(disk_cache_dir, f"{key}.png")
+        if os.path.exists(cache_path):
+            # 更新修改時間，清理快取時視為最近使用
+            try:
+                os.utime(cache_path)
+            except OSError:
+                pass
+            with Image.open(cache_path) as cached:
+                cached.load()
+                return cached.copy()
+
+    with Image.open(path) as image:
+        image.draft('RGB', (size[0] * 2, size[1] * 2))
+        image = image.convert('RGB')
+    image.thumbnail(size)
+
+    if cache_path:
+        try:
+            os.makedirs(disk_cache_dir, exist_ok=True)
+            image.save(cache_path, format='PNG')
+        except OSError as e:
+            logging.warning(f"寫入縮圖快取時出錯: {e}")
+    return image
+
+
+class ThumbnailCache:
+    """
+    照片縮圖快取。
+
+    縮圖在背景線程解碼，只處理目前需要的路徑；解碼結果經 poll() 在 Tk 主線程
+    轉為 PhotoImage，存入以位元組數為上限的 LRU 快取。快取以 (路徑, 修改時間) 為鍵，
+    照片被替換後舊縮圖不再命中。
+    disk_cache_dir 為 None 時不使用磁碟快取；啟用時超過 disk_cache_bytes 的舊縮圖會被清理。
+    """
+    def __init__(self, size=THUMBNAIL_SIZE, max_bytes=THUMBNAIL_CACHE_BYTES, disk_cache_dir=None,
+                 disk_cache_bytes=THUMBNAIL_DISK_CACHE_MB * 1024 * 1024, max_workers=2):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.disk_cache_dir = disk_cache_dir
+        self._cache = OrderedDict()  # (路徑, 修改時間) -> (PhotoImage, 位元組數)
+        self._cache_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._results = queue.Queue()
+        self._in_flight = set()
+        self._wanted = set()
+        self._wanted_lock = threading.Lock()
+        self._failed = {}  # 解碼失敗的路徑 -> 當時的修改時間，檔案變更前不再重試
+        if disk_cache_dir:
+            self._executor.submit(prune_disk_cache, disk_cache_dir, disk_cache_bytes)
+
+    def get(self, path):
+        """取得與目前檔案相符的已快取縮圖並標記為最近使用，未快取時返回 None (僅限主線程)"""
+        key = (path, file_mtime(path))
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        self._cache.move_to_end(key)
+        return entry[0]
+
+    def set_wanted(self, paths):
+        """設定目前需要的路徑，尚未開始解碼但已不需要的工作會被略過"""
+        with self._wanted_lock:
+            self._wanted = set(paths)
+
+    def request(self, path):
+        """排程背景解碼，已快取、解碼中或曾解碼失敗且檔案未變更的路徑不重複處理"""
+        if not path or path in self._in_flight:
+            return
+        mtime = file_mtime(path)
+        if (path, mtime) in self._cache:
+            return
+        if path in self._failed:
+            if self._failed[path] == mtime:
+                return
+            del self._failed[path]
+        self._in_flight.add(path)
+        self._executor.submit(self._decode, path)
+
+    def _decode(self, path):
+        with self._wanted_lock:
+            wanted = path in self._wanted
+        if not wanted:
+            self._results.put((path, None, None, False))
+            return
+        mtime = file_mtime(path)
+        try:
+            image = decode_thumbnail(path, self.size, self.disk_cache_dir)
+        except Exception as e:
+            logging.warning(f"產生縮圖時出錯: {path}, 錯誤: {e}")
+            self._results.put((path, mtime, None, True))
+            return
+        self._results.put((path, mtime, image, False))
+
+    def poll(self):
+        """
+        在主線程取出背景線程的結果，解碼完成的縮圖轉為 PhotoImage 存入快取。
+        返回取出的結果數，包含被略過與解碼失敗的路徑；不為 0 時呼叫端應重新檢查可見列，
+        略過的路徑若又回到畫面上需要重新排程。
+        """
+        drained = 0
+        try:
+            while True:
+                path, mtime, image, failed = self._results.get_nowait()
+                drained += 1
+                self._in_flight.discard(path)
+                if failed:
+                    self._failed[path] = mtime
+                if image is None:
+                    continue
+                photo = ImageTk.PhotoImage(image)
+                self._store((path, mtime), photo, image.width * image.height * 4)
+        except queue.Empty:
+            pass
+        return drained
+
+    @property
+    def pending(self):
+        return bool(self._in_flight)
+
+    def _store(self, key, photo, nbytes):
+        self._cache[key] = (photo, nbytes)
+        self._cache_bytes += nbytes
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, (_, evicted_bytes) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_bytes
+
+    def clear(self):
+        """清除記憶體快取與解碼失敗記錄，載入新的名冊或圖片資料夾時呼叫"""
+        self._cache.clear()
+        self._cache_bytes = 0
+        self._failed.clear()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
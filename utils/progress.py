@@ -0,0 +1,115 @@
+# utils/progress.py
+
+import logging
+import queue
+import time
+from collections import namedtuple
+
+# 一次進度更新：階段、已完成數、總數、每秒處理數、預估剩餘秒數、單位
+ProgressUpdate = namedtuple("ProgressUpdate", ["stage", "done", "total", "rate", "eta", "unit"])
+
+
+def format_progress(update):
+    """將進度更新格式化為顯示文字，GUI 與命令列共用"""
+    percentage = int(update.done / update.total * 100) if update.total else 0
+    text = f"{update.stage} {percentage}% ({update.done}/{update.total})"
+    if update.rate > 0:
+        text += f" · {update.rate:.1f} {update.unit}/秒"
+    if update.eta is not None:
+        minutes, seconds = divmod(int(update.eta + 0.5), 60)
+        text += f" · 剩餘 {minutes:02d}:{seconds:02d}"
+    return text
+
+
+def log_progress(update):
+    """命令列使用的輸出方式，將進度寫入日誌"""
+    logging.info(format_progress(update))
+
+
+class ProgressReporter:
+    """
+    節流的進度回報器。
+
+    在熱迴圈中呼叫時只累加計數，距上次輸出超過 interval 秒才計算速度與
+    預估剩餘時間並交給 sink，因此每張工作證呼叫一次的成本可忽略。
+    可直接作為 generate_pdf 的 progress_callback 使用。
+    """
+    def __init__(self, sink, total=0, stage="", unit="張", interval=0.1, clock=time.monotonic):
+        self.sink = sink
+        self.interval = interval
+        self.clock = clock
+        self.set_stage(stage, total, unit)
+
+    def __call__(self, n=1):
+        self.advance(n)
+
+    def set_stage(self, stage, total=0, unit=None):
+        """開始新的階段，計數與計時重新開始"""
+        self.stage = stage
+        self.total = total
+        if unit is not None:
+            self.unit = unit
+        self.done = 0
+        self._started = self.clock()
+        self._last_emit = self._started
+        self._emit(self._started)
+
+    def advance(self, n=1):
+        self.done += n
+        now = self.clock()
+        if now - self._last_emit >= self.interval:
+            self._emit(now)
+
+    def finish(self):
+        """輸出目前階段的最終進度"""
+        self._emit(self.clock())
+
+    def _emit(self, now):
+        self._last_emit = now
+        elapsed = now - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if rate > 0 and self.total:
+            eta = max(self.total - self.done, 0) / rate
+        else:
+            eta = None
+        self.sink(ProgressUpdate(self.stage, self.done, self.total, rate, eta, self.unit))
+
+
+class QueueProgress:
+    """
+    子程序使用的進度計數器。
+
+    在子程序內累加，每隔 interval 秒才把累計數放入跨程序佇列，
+    由主程序以 drain_progress_queue 轉交 ProgressReporter。
+    """
+    def __init__(self, progress_queue, interval=0.2, clock=time.monotonic):
+        self.progress_queue = progress_queue
+        self.interval = interval
+        self.clock = clock
+        self._pending = 0
+        self._last_flush = clock()
+
+    def __call__(self, n=1):
+        self._pending += n
+        now = self.clock()
+        if now - self._last_flush >= self.interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self._pending:
+            self.progress_queue.put(self._pending)
+            self._pending = 0
+        self._last_flush = self.clock() if now is None else now
+
+
+def drain_progress_queue(progress_queue, progress_callback):
+    """取出子程序回報的累計數並轉交 progress_callback"""
+    total = 0
+    try:
+        while True:
+            total += progress_queue.get_nowait()
+    except queue.Empty:
+        pass
+    if total and progress_callback:
+        progress_callback(total)
+    return total
@@ -6,6 +6,7 @@ import ctypes
 import logging
 from datetime import datetime, timedelta
 import math
+from functools import lru_cache
 from PIL import ImageFont
 import fitz  # PyMuPDF
 
@@ -53,11 +54,17 @@ def sanitize_font_name(font_name):
     """清理字體名稱，去除不允許的字符"""
     return ''.join(c for c in font_name if c.isalnum())
 
+@lru_cache(maxsize=None)
 def generate_offsets(n, radius):
     """生成 n 個方向的偏移量，形成一個圓形"""
     angles = [2 * math.pi * i / n for i in range(n)]
     return [(radius * math.cos(angle), radius * math.sin(angle)) for angle in angles]
 
+@lru_cache(maxsize=32)
+def load_pillow_font(font_path, size):
+    """載入指定大小的 Pillow 字體，結果快取以避免每次量測文字都重新讀取字體檔"""
+    return ImageFont.truetype(font_path, size)
+
 def fit_text_in_box(page, text, rect, max_fontsize, min_fontsize, font_name):
     """
     縮小字體直到文字適合矩形框，並使文字水平及垂直居中。
@@ -68,7 +75,7 @@ def fit_text_in_box(page, text, rect, max_fontsize, min_fontsize, font_name):
     while fontsize >= min_fontsize:
         try:
             # 使用 Pillow 計算文字寬高
-            pillow_font = ImageFont.truetype(FONT_PATH, int(fontsize))
+            pillow_font = load_pillow_font(FONT_PATH, int(fontsize))
         except IOError:
             logging.error(f"無法載入字體檔案: {FONT_PATH}")
             return min_fontsize
@@ -137,10 +144,11 @@ def convert_to_minguo_date(minguo_date_str):
         logging.error(f"日期格式錯誤: {minguo_date_str}, 錯誤: {e}")
         return minguo_date_str  # 返回原始格式
 
-def find_image_path(folder, name):
-    """根據姓名在資料夾中尋找對應的圖片，不考慮副檔名"""
+def build_image_index(folder):
+    """掃描資料夾一次，建立 {小寫檔名 (不含副檔名): 圖片路徑} 的索引"""
+    index = {}
     for file in os.listdir(folder):
         file_name, file_ext = os.path.splitext(file)
-        if file_name.lower() == name.lower():
-            return os.path.join(folder, file)
-    return None
+        # 同名檔案以第一個為準
+        index.setdefault(file_name.lower(), os.path.join(folder, file))
+    return index